@@ -1,78 +1,291 @@
 # Image Steganography Tool
 # Hide and extract secret messages in images using LSB (Least Significant Bit) technique
 
+import ctypes
+import io
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 import numpy as np
-from flask import Flask, render_template, request, jsonify
-import base64
-
-class Steganography:
-    @staticmethod
-    def encode_message(image_path, message, output_path):
-        """Hide a message inside an image using LSB steganography"""
+from flask import Flask, request, jsonify, send_file
+
+try:
+    import numba
+    from numba import njit, prange, types
+except ImportError:
+    njit = None
+
+# Native kernels built from stego_kernel.c (see README)
+try:
+    _kernel = ctypes.CDLL(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       '_stegokernel.dll' if os.name == 'nt' else '_stegokernel.so'))
+except OSError:
+    _kernel = None
+
+# Header stored ahead of the payload: a signature byte and format version, then
+# the big-endian byte length. Images from before the header begin with the
+# message itself, one Latin-1 byte per character, so one starting with '¥'
+# (0xA5) still matches the signature byte; it takes the version byte too, i.e.
+# a second character of U+0001, before decode reads a legacy image as headed
+HEADER_MAGIC = b'\xa5\x01'
+LENGTH_BYTES = 4
+HEADER_BITS = (len(HEADER_MAGIC) + LENGTH_BYTES) * 8
+# zlib level for encoded PNGs; PNG is only used because it is lossless, and
+# level 1 saves ~5x faster than the default 6 for ~20% larger files
+PNG_COMPRESS_LEVEL = 1
+# Channel values examined per decode step (8 per hidden byte)
+DECODE_CHUNK = 64 * 1024
+# Hidden bytes below which the NumPy kernels skip threading
+PARALLEL_MIN = 1 << 17
+# Hidden bytes per NumPy kernel step; 32 KiB of bytes spans 256 KiB of
+# channel values, so each step's temporaries stay cache-resident
+TILE_BYTES = 32 * 1024
+
+
+# Slice workers shared by every caller, so concurrent web requests queue for the
+# same cpu_count threads instead of each starting a pool of their own
+_WORKERS = os.cpu_count() or 1
+_POOL = ThreadPoolExecutor(max_workers=_WORKERS)
+
+
+def _run_sliced(func, n):
+    """Call func on contiguous slices covering range(n), across threads when n is large"""
+    if n < PARALLEL_MIN or _WORKERS == 1:
+        func(slice(0, n))
+        return
+
+    # NumPy ufuncs release the GIL, so the slices really do run concurrently
+    step = -(-n // _WORKERS)
+    list(_POOL.map(func, [slice(i, min(i + step, n)) for i in range(0, n, step)]))
+
+
+def _embed_lsb_numpy(flat, payload):
+    """Fallback embed: tiled NumPy unpackbits, split across threads when large"""
+    def embed(s):
+        for start in range(s.start, s.stop, TILE_BYTES):
+            stop = min(start + TILE_BYTES, s.stop)
+            view = flat[8 * start:8 * stop]
+            view &= np.uint8(0xFE)
+            view |= np.unpackbits(payload[start:stop])
+
+    _run_sliced(embed, payload.size)
+
+
+def _extract_lsb_numpy(flat):
+    """Fallback extract: tiled NumPy packbits, split across threads when large"""
+    out = np.empty(flat.size // 8, dtype=np.uint8)
+
+    def extract(s):
+        for start in range(s.start, s.stop, TILE_BYTES):
+            stop = min(start + TILE_BYTES, s.stop)
+            out[start:stop] = np.packbits(np.bitwise_and(flat[8 * start:8 * stop], 1))
+
+    _run_sliced(extract, out.size)
+    return out
+
+
+def _native_kernels(lib):
+    """Bind the stego_kernel.c functions in lib, returning (embed, extract) wrappers"""
+    lib.pack_lsb.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t]
+    lib.pack_lsb.restype = None
+    lib.embed_lsb.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t]
+    lib.embed_lsb.restype = None
+
+    def embed_lsb(flat, payload):
+        # flat must be a contiguous view of the image being written
+        lib.embed_lsb(flat.ctypes.data, payload.ctypes.data, payload.size)
+
+    def extract_lsb(flat):
+        flat = np.ascontiguousarray(flat)
+        out = np.empty(flat.size // 8, dtype=np.uint8)
+        lib.pack_lsb(flat.ctypes.data, out.ctypes.data, out.size)
+        return out
+
+    return embed_lsb, extract_lsb
+
+
+# LSB kernels: native when built, else JIT-compiled, plain NumPy otherwise.
+# Only the chosen backend is set up, so a native build skips Numba's compile
+if _kernel is not None:
+    _embed_lsb, _extract_lsb = _native_kernels(_kernel)
+elif njit is not None:
+    # The web server calls the kernels from several threads at once, which makes
+    # the workqueue layer (used when neither TBB nor OpenMP is installed) abort
+    # the whole process. Ask for a thread-safe layer unless the user picked one
+    if 'NUMBA_THREADING_LAYER' not in os.environ:
+        numba.config.THREADING_LAYER = 'threadsafe'
+
+    def _build_numba_kernels():
+        """Compile the Numba kernels, or return the NumPy ones if no thread-safe layer loads"""
+        # Compiling (or loading from the on-disk cache) starts Numba's thread
+        # pool, so it waits for the first kernel call rather than happening at
+        # import; image data from PIL arrives read-only
+        u8 = types.Array(types.uint8, 1, 'C')
+        u8_ro = types.Array(types.uint8, 1, 'C', readonly=True)
         try:
-            input_ext = os.path.splitext(image_path)[1].lower()
+            @njit([types.void(u8, u8), types.void(u8, u8_ro)],
+                  parallel=True, cache=True, boundscheck=False)
+            def embed_lsb(flat, payload):
+                for i in prange(payload.size * 8):
+                    flat[i] = (flat[i] & 0xFE) | ((payload[i >> 3] >> (7 - (i & 7))) & 1)
+
+            @njit([u8(u8), u8(u8_ro)], parallel=True, cache=True, boundscheck=False)
+            def extract_lsb(flat):
+                # Read 8 channel values per uint64 (little-endian host) and gather
+                # their LSBs with one SWAR multiply; bit 0 of byte k lands in bit 63 - k
+                words = flat[:flat.size // 8 * 8].view(np.uint64)
+                out = np.empty(words.size, dtype=np.uint8)
+                for j in prange(words.size):
+                    out[j] = ((words[j] & np.uint64(0x0101010101010101))
+                              * np.uint64(0x8040201008040201)) >> np.uint64(56)
+                return out
+
+            # A tiny warm-up call so the threading layer is known
+            extract_lsb(np.zeros(8, dtype=np.uint8))
+            layer = numba.threading_layer()
+        except ValueError as e:
+            # Raised when no layer satisfying THREADING_LAYER can be loaded
+            layer = str(e).splitlines()[0]
+        if layer not in ('tbb', 'omp'):
+            print(f"⚠️ Numba threading layer unusable from several threads ({layer}); "
+                  "using the NumPy kernels. Install tbb to enable Numba.")
+            return _embed_lsb_numpy, _extract_lsb_numpy
+        return embed_lsb, extract_lsb
+
+    _numba_kernels = None
+    _numba_lock = threading.Lock()
+
+    def _load_numba_kernels():
+        """Return the (embed, extract) pair, building it on first use"""
+        global _numba_kernels
+        with _numba_lock:
+            if _numba_kernels is None:
+                _numba_kernels = _build_numba_kernels()
+        return _numba_kernels
+
+    def _embed_lsb(flat, payload):
+        (_numba_kernels or _load_numba_kernels())[0](flat, payload)
+
+    def _extract_lsb(flat):
+        return (_numba_kernels or _load_numba_kernels())[1](flat)
+else:
+    _embed_lsb, _extract_lsb = _embed_lsb_numpy, _extract_lsb_numpy
+
+
+def _open_rgb(image_path):
+    """Open an image in RGB mode, converting only when it isn't already"""
+    img = Image.open(image_path)
+    if img.mode != 'RGB':
+        rgb = img.convert('RGB')
+        img.close()
+        img = rgb
+    return img
+
+
+def encode_message(image_path, message, output_path):
+    """Hide a message inside an image using LSB steganography
+
+    image_path may also be a readable file-like object, and output_path a
+    writable one, which receives PNG data.
+    """
+    try:
+        if not message:
+            return False, "Message cannot be empty."
+
+        if isinstance(output_path, str):
             output_ext = os.path.splitext(output_path)[1].lower()
+            save_format = None
 
             # Warn for JPEG
             if output_ext in ['.jpg', '.jpeg']:
                 print("⚠️ JPEG format may corrupt hidden data. Use PNG instead.")
                 return False, "Encoding cancelled. Please use PNG format."
+        else:
+            save_format = 'PNG'
+
+        # Open image
+        img = _open_rgb(image_path)
+
+        # Reject oversized messages from the image header alone, before the
+        # pixel data is decoded or copied
+        msg_bytes = message.encode('utf-8')
+        max_capacity = img.width * img.height * 3
+        if HEADER_BITS + len(msg_bytes) * 8 > max_capacity:
+            return False, "Message too long for this image."
+
+        # Prefix the payload with the signature and its byte length so decode
+        # can recognise it and knows where it ends
+        payload = HEADER_MAGIC + len(msg_bytes).to_bytes(LENGTH_BYTES, 'big') + msg_bytes
+        payload = np.frombuffer(payload, dtype=np.uint8)
+
+        # Only the rows holding the first 8 * len(payload) channel values change:
+        # copy that strip out (np.array copies, PIL's own buffer can't be written
+        # through NumPy), overwrite its LSBs and paste it back, so the rest of
+        # the image is never copied
+        rows = -(-payload.size * 8 // (img.width * 3))
+        strip = np.array(img.crop((0, 0, img.width, rows)))
+        _embed_lsb(strip.ravel(), payload)
+        img.paste(Image.fromarray(strip), (0, 0))
+
+        img.save(output_path, format=save_format, compress_level=PNG_COMPRESS_LEVEL)
+        img.close()
+
+        return True, "Message successfully hidden in image."
+    except Exception as e:
+        return False, f"Error encoding message: {str(e)}"
 
-            # Open image
-            img = Image.open(image_path).convert('RGB')
-            img_array = np.array(img)
-
-            message += "<<<END>>>"
-            binary_message = ''.join(format(ord(c), '08b') for c in message)
-
-            max_capacity = img_array.size
-            if len(binary_message) > max_capacity:
-                return False, "Message too long for this image."
-
-            flat_img = img_array.flatten()
-            for i in range(len(binary_message)):
-                flat_img[i] = (flat_img[i] & 0xFE) | int(binary_message[i])
-
-            encoded_img_array = flat_img.reshape(img_array.shape)
-            encoded_img = Image.fromarray(encoded_img_array.astype('uint8'))
-            encoded_img.save(output_path)
 
-            return True, "Message successfully hidden in image."
-        except Exception as e:
-            return False, f"Error encoding message: {str(e)}"
+def decode_message(image_path):
+    """Extract hidden message from an image (path or readable file-like object)"""
+    try:
+        img = _open_rgb(image_path)
+        # The array owns its own copy of the pixels, so the image can go
+        img_array = np.asarray(img)
+        img.close()
+
+        flat_img = img_array.ravel()
+        if flat_img.size >= HEADER_BITS:
+            header = _extract_lsb(flat_img[:HEADER_BITS]).tobytes()
+            length = int.from_bytes(header[len(HEADER_MAGIC):], 'big')
+            # encode_message never writes an empty message, so a zero length is
+            # an unencoded image that happens to carry the signature
+            if header.startswith(HEADER_MAGIC) and 0 < length <= (flat_img.size - HEADER_BITS) // 8:
+                body = flat_img[HEADER_BITS:HEADER_BITS + 8 * length]
+                try:
+                    return True, _extract_lsb(body).tobytes().decode('utf-8')
+                except UnicodeDecodeError:
+                    pass
+
+        # Images encoded before the header existed end with a <<<END>>> marker
+        return _decode_terminated(flat_img)
+    except Exception as e:
+        return False, f"Error decoding message: {str(e)}"
 
-    @staticmethod
-    def decode_message(image_path):
-        """Extract hidden message from an image"""
-        try:
-            img = Image.open(image_path).convert('RGB')
-            img_array = np.array(img)
 
-            flat_img = img_array.flatten()
-            binary_message = "".join(str(pixel & 1) for pixel in flat_img)
+def _decode_terminated(flat_img):
+    """Extract a legacy message terminated by <<<END>>>"""
+    # Only whole bytes count, matching what encode_message could write
+    usable = flat_img.size - flat_img.size % 8
 
-            message = ""
-            for i in range(0, len(binary_message), 8):
-                byte = binary_message[i:i+8]
-                if len(byte) < 8:
-                    break
-                char = chr(int(byte, 2))
-                message += char
-                if message.endswith("<<<END>>>"):
-                    return True, message[:-9]
+    # Scan in chunks so short messages stop long before the end of the image,
+    # writing into one preallocated buffer instead of growing it
+    buf = bytearray(usable // 8)
+    pos = 0
+    for start in range(0, usable, DECODE_CHUNK):
+        packed = _extract_lsb(flat_img[start:min(start + DECODE_CHUNK, usable)])
+        buf[pos:pos + packed.size] = memoryview(packed)
+        idx = buf.find(b"<<<END>>>", max(0, pos - 8), pos + packed.size)
+        pos += packed.size
+        if idx != -1:
+            # The terminated format wrote each character as one byte (Latin-1)
+            return True, buf[:idx].decode('latin-1')
 
-            return False, "No hidden message found."
-        except Exception as e:
-            return False, f"Error decoding message: {str(e)}"
+    return False, "No hidden message found."
 
 
 class TerminalMode:
-    def __init__(self):
-        self.stego = Steganography()
-
     def run(self):
         """Run the terminal interface"""
         while True:
@@ -111,7 +324,7 @@ class TerminalMode:
         if not output_path:
             output_path = "encoded_image.png"
 
-        success, result = self.stego.encode_message(image_path, message, output_path)
+        success, result = encode_message(image_path, message, output_path)
         print("✓" if success else "✗", result)
 
     def decode_terminal(self):
@@ -121,7 +334,7 @@ class TerminalMode:
             print("Error: Image not found!")
             return
 
-        success, result = self.stego.decode_message(image_path)
+        success, result = decode_message(image_path)
         print("✓" if success else "✗", result)
 
 
@@ -132,7 +345,8 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    # The page has no template variables, so serve it as a plain static file
+    return app.send_static_file('index.html')
 
 
 @app.route('/encode', methods=['POST'])
@@ -149,23 +363,13 @@ def encode_api():
         if not message:
             return jsonify({'success': False, 'message': 'Message cannot be empty'})
 
-        temp_input = 'temp_input.png'
-        temp_output = 'temp_output.png'
-        file.save(temp_input)
-
-        stego = Steganography()
-        success, result = stego.encode_message(temp_input, message, temp_output)
+        output = io.BytesIO()
+        success, result = encode_message(file.stream, message, output)
 
         if success:
-            with open(temp_output, 'rb') as img_file:
-                img_data = base64.b64encode(img_file.read()).decode()
-
-            os.remove(temp_input)
-            os.remove(temp_output)
-
-            return jsonify({'success': True, 'message': result, 'image_data': img_data})
+            output.seek(0)
+            return send_file(output, mimetype='image/png', as_attachment=True, download_name='encoded.png')
         else:
-            os.remove(temp_input)
             return jsonify({'success': False, 'message': result})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -181,13 +385,8 @@ def decode_api():
         if not file or file.filename == '':
             return jsonify({'success': False, 'message': 'No image selected'})
 
-        temp_input = 'temp_decode.png'
-        file.save(temp_input)
+        success, result = decode_message(file.stream)
 
-        stego = Steganography()
-        success, result = stego.decode_message(temp_input)
-
-        os.remove(temp_input)
         return jsonify({'success': success, 'message': result, 'decoded_message': result if success else ''})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -209,84 +408,15 @@ def main():
             break
         elif choice == '2':
             print("\nStarting GUI Mode at http://localhost:5000")
-            os.makedirs('templates', exist_ok=True)
-
-            # Dark mode frontend
-            html_content = """<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="UTF-8">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<title>Steganography Tool</title>
-<style>
-/* === DARK MODE STYLE === */
-body { font-family: 'Segoe UI', sans-serif; background: #121212; color: #e0e0e0; padding: 20px; display:flex;justify-content:center;align-items:center;height:100vh; }
-.container { max-width:800px;width:100%;background:rgba(30,30,30,0.9);border-radius:16px;padding:30px;box-shadow:0 8px 25px rgba(0,0,0,0.6);}
-.header { text-align:center;margin-bottom:20px;}
-.header h1 { font-size:2rem; background:linear-gradient(90deg,#00c6ff,#0072ff);-webkit-background-clip:text;-webkit-text-fill-color:transparent;}
-.mode-selector { display:flex; margin-bottom:20px; }
-.mode-btn { flex:1; padding:12px; background:#1f1f1f; border:none; color:#bbb; cursor:pointer; transition:0.3s; }
-.mode-btn.active { background:linear-gradient(90deg,#00c6ff,#0072ff); color:white; font-weight:bold;}
-.mode-btn:hover:not(.active){background:#292929;}
-.section { display:none;}
-.section.active { display:block; }
-label { display:block;margin-bottom:6px;color:#ddd;font-weight:600;}
-.file-input-label { display:block;padding:14px;background:rgba(255,255,255,0.05);border:2px dashed #555;border-radius:10px;text-align:center;cursor:pointer;color:#aaa;transition:0.3s;}
-.file-input-label:hover{border-color:#00c6ff;color:#fff;}
-textarea{width:100%;padding:14px;background:#1f1f1f;border:2px solid #333;border-radius:10px;color:#e0e0e0;resize:vertical;min-height:100px;}
-textarea:focus{border-color:#00c6ff;outline:none;}
-.btn{width:100%;padding:14px;background:linear-gradient(90deg,#00c6ff,#0072ff);color:white;border:none;border-radius:10px;cursor:pointer;font-size:1.1rem;transition:0.3s;}
-.btn:hover{transform:translateY(-2px);box-shadow:0 5px 15px rgba(0,198,255,0.4);}
-.result{margin-top:15px;padding:12px;border-radius:10px;display:none;}
-.result.success{background:rgba(0,255,128,0.1);border:1px solid #00ff80;color:#00ffb0;}
-.result.error{background:rgba(255,0,64,0.1);border:1px solid #ff0040;color:#ff5577;}
-.download-btn{margin-top:10px;background:linear-gradient(90deg,#ff6a00,#ee0979);}
-</style>
-</head>
-<body>
-<div class="container">
-<div class="header"><h1>🔒 Steganography Tool</h1><p>Hide and extract secret messages</p></div>
-<div class="mode-selector">
-<button class="mode-btn active" onclick="switchMode('encode')">📝 Encode</button>
-<button class="mode-btn" onclick="switchMode('decode')">🔍 Decode</button>
-</div>
-<div id="encode-section" class="section active">
-<form id="encode-form" enctype="multipart/form-data">
-<label>Choose Image:</label>
-<input type="file" id="encode-image" accept="image/*" required hidden>
-<label for="encode-image" class="file-input-label">📁 Click to select image</label>
-<label>Secret Message:</label>
-<textarea id="encode-message" placeholder="Enter secret message..."></textarea>
-<button type="submit" class="btn">🔐 Encode</button>
-</form>
-<div id="encode-result" class="result"></div>
-</div>
-<div id="decode-section" class="section">
-<form id="decode-form" enctype="multipart/form-data">
-<label>Choose Encoded Image:</label>
-<input type="file" id="decode-image" accept="image/*" required hidden>
-<label for="decode-image" class="file-input-label">📁 Click to select encoded image</label>
-<button type="submit" class="btn">🔍 Decode</button>
-</form>
-<div id="decode-result" class="result"></div>
-</div>
-</div>
-<script>
-function switchMode(mode){document.querySelectorAll('.mode-btn').forEach(b=>b.classList.remove('active'));event.target.classList.add('active');document.querySelectorAll('.section').forEach(s=>s.classList.remove('active'));document.getElementById(mode+'-section').classList.add('active');}
-document.getElementById('encode-form').addEventListener('submit',async e=>{
-e.preventDefault();const f=new FormData();f.append('image',document.getElementById('encode-image').files[0]);f.append('message',document.getElementById('encode-message').value);
-const r=await fetch('/encode',{method:'POST',body:f});const d=await r.json();const res=document.getElementById('encode-result');res.style.display='block';res.className='result '+(d.success?'success':'error');res.innerHTML=d.message;if(d.success){const b=document.createElement('button');b.className='btn download-btn';b.innerHTML='💾 Download';b.onclick=()=>downloadImage(d.image_data,'encoded.png');res.appendChild(b);}});
-document.getElementById('decode-form').addEventListener('submit',async e=>{
-e.preventDefault();const f=new FormData();f.append('image',document.getElementById('decode-image').files[0]);const r=await fetch('/decode',{method:'POST',body:f});const d=await r.json();const res=document.getElementById('decode-result');res.style.display='block';res.className='result '+(d.success?'success':'error');res.innerHTML=d.success?'Decoded: '+d.decoded_message:d.message;});
-function downloadImage(data,name){const a=document.createElement('a');a.href='data:image/png;base64,'+data;a.download=name;a.click();}
-</script>
-</body>
-</html>"""
-
-            with open("templates/index.html", "w", encoding="utf-8") as f:
-                f.write(html_content)
-
-            app.run(host="0.0.0.0", port=5000, debug=False)
+            # Build the kernels now rather than on the first request
+            _extract_lsb(np.zeros(8, dtype=np.uint8))
+            try:
+                from waitress import serve
+            except ImportError:
+                # Flask's development server, one thread per request
+                app.run(host="0.0.0.0", port=5000, debug=False, threaded=True)
+            else:
+                serve(app, host="0.0.0.0", port=5000, threads=8)
             break
         else:
             print("Invalid choice. Enter 1 or 2.")
@@ -0,0 +1,101 @@
+/* Optional native LSB kernels for main.py, loaded through ctypes.
+ *
+ * Build next to main.py:
+ *   cc -O3 -march=native -shared -fPIC -o _stegokernel.so stego_kernel.c
+ *
+ * Add -fopenmp to split large images across cores.
+ *
+ * Assumes a little-endian host. main.py falls back to Numba/NumPy when the
+ * library is missing.
+ */
+
+#include <stddef.h>
+#include <stdint.h>
+#include <string.h>
+
+#if defined(__AVX2__) || defined(__BMI2__)
+#include <immintrin.h>
+#endif
+
+/* Output bytes below which starting a thread team costs more than it saves */
+#define PARALLEL_MIN 65536
+
+#ifdef _OPENMP
+#define DO_PRAGMA(x) _Pragma(#x)
+#define PARALLEL_FOR(n) DO_PRAGMA(omp parallel for schedule(static) if ((n) >= PARALLEL_MIN))
+#else
+#define PARALLEL_FOR(n)
+#endif
+
+/* Pack the LSBs of n8 groups of 8 bytes into n8 bytes, first byte in the MSB
+ * (the same order as numpy.packbits). */
+void pack_lsb(const uint8_t *in, uint8_t *out, size_t n8)
+{
+    size_t i = 0;
+
+#ifdef __AVX2__
+    /* Reverse each 8-byte group so movemask emits its first byte as bit 7 */
+    const __m256i rev = _mm256_setr_epi8(7, 6, 5, 4, 3, 2, 1, 0, 15, 14, 13, 12, 11, 10, 9, 8,
+                                         7, 6, 5, 4, 3, 2, 1, 0, 15, 14, 13, 12, 11, 10, 9, 8);
+    const size_t nvec = n8 / 4;
+    PARALLEL_FOR(n8)
+    for (size_t b = 0; b < nvec; b++) {
+        __m256i v = _mm256_loadu_si256((const __m256i *)(in + 32 * b));
+        /* Move each byte's LSB into its sign bit, then gather the 32 sign bits */
+        v = _mm256_slli_epi64(_mm256_shuffle_epi8(v, rev), 7);
+        uint32_t m = (uint32_t)_mm256_movemask_epi8(v);
+        memcpy(out + 4 * b, &m, sizeof m);
+    }
+    i = 4 * nvec;
+#endif
+
+    PARALLEL_FOR(n8 - i)
+    for (size_t j = i; j < n8; j++) {
+        uint64_t v;
+        memcpy(&v, in + 8 * j, sizeof v);
+#ifdef __BMI2__
+        /* Byte-swap so in[0] lands in the top byte and PEXT emits it as bit 7 */
+        out[j] = (uint8_t)_pext_u64(__builtin_bswap64(v), 0x0101010101010101ULL);
+#else
+        /* SWAR gather: the multiply moves bit 0 of byte k to bit 63 - k */
+        out[j] = (uint8_t)(((v & 0x0101010101010101ULL) * 0x8040201008040201ULL) >> 56);
+#endif
+    }
+}
+
+/* Write the bits of nbytes_msg message bytes into the LSBs of 8 * nbytes_msg
+ * pixel bytes, MSB first. */
+void embed_lsb(uint8_t *pixels, const uint8_t *packed_msg, size_t nbytes_msg)
+{
+    size_t i = 0;
+
+#ifdef __AVX2__
+    /* Byte k of each 32-pixel block takes message byte k / 8 ... */
+    const __m256i spread = _mm256_setr_epi8(0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1,
+                                            2, 2, 2, 2, 2, 2, 2, 2, 3, 3, 3, 3, 3, 3, 3, 3);
+    /* ... and keeps bit 7 - k % 8 of it */
+    const __m256i select = _mm256_set1_epi64x((long long)0x0102040810204080ULL);
+    const __m256i keep = _mm256_set1_epi8((char)0xFE);
+    const __m256i one = _mm256_set1_epi8(1);
+    const size_t nvec = nbytes_msg / 4;
+    PARALLEL_FOR(nbytes_msg)
+    for (size_t b = 0; b < nvec; b++) {
+        uint32_t word;
+        memcpy(&word, packed_msg + 4 * b, sizeof word);
+        __m256i bits = _mm256_shuffle_epi8(_mm256_set1_epi32((int)word), spread);
+        bits = _mm256_and_si256(_mm256_cmpeq_epi8(_mm256_and_si256(bits, select), select), one);
+
+        __m256i px = _mm256_loadu_si256((const __m256i *)(pixels + 32 * b));
+        px = _mm256_or_si256(_mm256_and_si256(px, keep), bits);
+        _mm256_storeu_si256((__m256i *)(pixels + 32 * b), px);
+    }
+    i = 4 * nvec;
+#endif
+
+    PARALLEL_FOR(nbytes_msg - i)
+    for (size_t j = i; j < nbytes_msg; j++) {
+        uint8_t *p = pixels + 8 * j;
+        for (int k = 0; k < 8; k++)
+            p[k] = (uint8_t)((p[k] & 0xFE) | ((packed_msg[j] >> (7 - k)) & 1));
+    }
+}
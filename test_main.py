@@ -0,0 +1,130 @@
+import ctypes
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import main
+
+
+def _save(tmp_path, name, pixels):
+    path = str(tmp_path / name)
+    Image.fromarray(pixels.astype(np.uint8), 'RGB').save(path)
+    return path
+
+
+@pytest.fixture
+def cover(tmp_path):
+    rng = np.random.default_rng(0)
+    return _save(tmp_path, 'cover.png', rng.integers(0, 256, (100, 100, 3)))
+
+
+@pytest.mark.parametrize('message', ['hello', 'héllo wörld ✓', 'x' * 3000])
+def test_round_trip(cover, tmp_path, message):
+    out = str(tmp_path / 'encoded.png')
+    assert main.encode_message(cover, message, out) == (True, "Message successfully hidden in image.")
+    assert main.decode_message(out) == (True, message)
+
+
+@pytest.mark.parametrize('message', ['old secret', 'café ±5°', '¥1 each'])
+def test_decodes_legacy_terminated_image(tmp_path, message):
+    # Images written before the length header carry message + <<<END>>> from the
+    # first channel value, one Latin-1 byte per character
+    pixels = np.random.default_rng(1).integers(0, 256, (100, 100, 3)).astype(np.uint8)
+    bits = np.unpackbits(np.frombuffer((message + "<<<END>>>").encode('latin-1'), dtype=np.uint8))
+    flat = pixels.reshape(-1)
+    flat[:bits.size] = (flat[:bits.size] & 0xFE) | bits
+    path = _save(tmp_path, 'legacy.png', pixels)
+
+    assert main.decode_message(path) == (True, message)
+
+
+@pytest.mark.parametrize('fill', [0, 254, 255])
+def test_unencoded_cover_has_no_message(tmp_path, fill):
+    path = _save(tmp_path, 'blank.png', np.full((100, 100, 3), fill))
+    assert main.decode_message(path) == (False, "No hidden message found.")
+
+
+def test_random_cover_has_no_message(cover):
+    assert main.decode_message(cover) == (False, "No hidden message found.")
+
+
+def test_rejects_empty_message(cover, tmp_path):
+    assert main.encode_message(cover, '', str(tmp_path / 'out.png')) == (False, "Message cannot be empty.")
+
+
+def test_rejects_message_over_capacity(cover, tmp_path):
+    # 100x100 RGB holds 3750 bytes, 6 of them header
+    out = str(tmp_path / 'out.png')
+    assert main.encode_message(cover, 'a' * 3744, out)[0]
+    assert main.encode_message(cover, 'a' * 3745, out) == (False, "Message too long for this image.")
+
+
+def _cpu_has(*flags):
+    try:
+        with open('/proc/cpuinfo') as f:
+            present = set(f.read().split())
+    except OSError:
+        return False
+    return all(flag in present for flag in flags)
+
+
+# Plain C (SWAR), the AVX2/BMI2 paths, and the OpenMP-split loops
+@pytest.fixture(scope='module', params=[[], ['-mavx2', '-mbmi2'], ['-fopenmp']],
+                ids=['c', 'avx2-bmi2', 'openmp'])
+def native_kernels(request, tmp_path_factory):
+    cc = shutil.which(os.environ.get('CC', 'cc'))
+    if cc is None:
+        pytest.skip('no C compiler')
+    if '-mavx2' in request.param and not _cpu_has('avx2', 'bmi2'):
+        pytest.skip('CPU lacks AVX2/BMI2')
+    src = os.path.join(os.path.dirname(os.path.abspath(main.__file__)), 'stego_kernel.c')
+    lib = str(tmp_path_factory.mktemp('kernel') / '_stegokernel.so')
+    build = subprocess.run([cc, '-O3', *request.param, '-shared', '-fPIC', '-o', lib, src],
+                           capture_output=True)
+    if build.returncode != 0:
+        pytest.skip(f'build failed: {build.stderr.decode(errors="replace")}')
+    return main._native_kernels(ctypes.CDLL(lib))
+
+
+def _check_kernels(embed, extract, n):
+    rng = np.random.default_rng(n)
+    # A few trailing channel values that don't make a whole byte
+    flat = rng.integers(0, 256, 8 * n + 5, dtype=np.uint8)
+    payload = rng.integers(0, 256, n, dtype=np.uint8)
+
+    assert np.array_equal(extract(flat), np.packbits(flat[:8 * n] & 1))
+
+    expected = flat.copy()
+    expected[:8 * n] = (expected[:8 * n] & 0xFE) | np.unpackbits(payload)
+    embed(flat, payload)
+    assert np.array_equal(flat, expected)
+
+
+# Byte counts off the 4-byte (AVX2) block size, and past the C PARALLEL_MIN
+@pytest.mark.parametrize('n', [1, 3, 33, 1027, 65536, 65541, 200003])
+def test_native_kernels_match_numpy(native_kernels, n):
+    _check_kernels(*native_kernels, n)
+
+
+@pytest.fixture(params=['numpy', 'numba'])
+def python_kernels(request):
+    if request.param == 'numpy':
+        return main._embed_lsb_numpy, main._extract_lsb_numpy
+    # Only built when the native kernels are missing, and may fall back to NumPy
+    if not hasattr(main, '_load_numba_kernels') or main._load_numba_kernels()[0] is main._embed_lsb_numpy:
+        pytest.skip('Numba kernels not in use')
+    return main._load_numba_kernels()
+
+
+# Byte counts either side of a NumPy tile and of the threading threshold, run
+# both on one thread and split across four
+@pytest.mark.parametrize('workers', [1, 4])
+@pytest.mark.parametrize('n', [1, main.TILE_BYTES - 1, main.TILE_BYTES + 1,
+                               main.PARALLEL_MIN - 1, main.PARALLEL_MIN + main.TILE_BYTES + 3])
+def test_python_kernels_match_numpy(python_kernels, monkeypatch, workers, n):
+    monkeypatch.setattr(main, '_WORKERS', workers)
+    _check_kernels(*python_kernels, n)